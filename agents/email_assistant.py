@@ -3,7 +3,7 @@ import streamlit as st
 from typing import Any, Optional
 from utils.formatters import split_subject_from_body
 from utils.rag import estimate_tokens
-from utils.state_manager import queue_action_collapse
+from utils.state_manager import queue_action_collapse, record_assistant_message
 from tools.google_tools import GoogleWorkspaceError
 
 
@@ -139,7 +139,6 @@ def apply_email_edit(mcp_client, db, instructions: str) -> None:
         },
     )
     pending["body"] = revised
-    st.session_state.pending_email = pending
     st.session_state.email_draft_sync_value = revised
     # Don't set show_email_builder here - let the handler manage it after processing
 
@@ -179,18 +178,12 @@ def send_email_draft(mcp_client, db) -> None:
     with st.chat_message("assistant"):
         st.success(confirmation)
 
-    out_toks = estimate_tokens(confirmation)
-    st.session_state.messages.append({"role": "assistant", "content": confirmation})
-    db.add_message(
-        st.session_state.current_session_id,
-        "assistant",
+    record_assistant_message(
+        db,
+        mcp_client,
         confirmation,
-        tokens_out=out_toks,
-    )
-    mcp_client.log_interaction(
-        st.session_state.current_session_id,
-        "email_sent",
-        {"to": pending["to"], "subject": pending["subject"], "message_id": message_id},
+        log_kind="email_sent",
+        log_payload={"to": pending["to"], "subject": pending["subject"], "message_id": message_id},
     )
 
     sent_action = {
@@ -200,7 +193,6 @@ def send_email_draft(mcp_client, db) -> None:
         "message_id": message_id,
     }
 
-    st.session_state.token_total += out_toks
     st.session_state.pending_email = None
     st.session_state.email_draft_sync_value = None
     queue_action_collapse("email", sent_action)
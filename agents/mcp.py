@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import json
 import logging
 import os
 import re
 import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional, Sequence
 
 try:
     import anyio  
+    import anyio.from_thread
 except ImportError:  
     anyio = None  
 
@@ -27,6 +36,7 @@ try:
     from mcp.client.stdio import StdioServerParameters, stdio_client
     from mcp.server import NotificationOptions, Server
     from mcp.server.stdio import stdio_server as mcp_stdio_server
+    from mcp.shared.exceptions import McpError
 
     MCP_AVAILABLE = True
 except ImportError:  
@@ -37,6 +47,7 @@ except ImportError:
     NotificationOptions = None  
     Server = None  
     mcp_stdio_server = None  
+    McpError = None  
     MCP_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
@@ -50,6 +61,8 @@ SERVER_NAME = "usf_workspace_tools"
 SERVER_VERSION = "1.0.0"
 DEFAULT_SERVER_CMD = [_PYTHON_BIN, "-m", "agents.mcp", "serve"]
 DEFAULT_SERVER_CWD = Path(__file__).resolve().parents[1]
+RETRIEVE_CACHE_SIZE = int(os.getenv("MCP_RETRIEVE_CACHE_SIZE", "256"))
+RETRIEVE_CACHE_TTL = float(os.getenv("MCP_RETRIEVE_CACHE_TTL", "300"))
 
 PHI4_EMAIL_DEPLOYMENT = os.getenv("AZURE_PHI4_EMAIL") or os.getenv("AZURE_PHI4_ORCHESTRATOR") or os.getenv("AZURE_OPENAI_DEPLOYMENT")
 PHI4_MEETING_DEPLOYMENT = os.getenv("AZURE_PHI4_MEETING") or os.getenv("AZURE_PHI4_ORCHESTRATOR") or os.getenv("AZURE_OPENAI_DEPLOYMENT")
@@ -260,15 +273,16 @@ class _ToolRuntime:
             )
         return plan
 
-def _tool_definitions() -> list[mcp_types.Tool]:
-    """Return the MCP tool catalog."""
+@lru_cache(maxsize=1)
+def _tool_definitions() -> tuple[mcp_types.Tool, ...]:
+    """Return the MCP tool catalog (built once; treat as read-only)."""
     if not MCP_AVAILABLE:
         raise RuntimeError("MCP SDK not installed; run `pip install mcp` to enable tools.")
 
     annotations_read_only = mcp_types.ToolAnnotations(readOnlyHint=True, idempotentHint=True)
     annotations_mutating = mcp_types.ToolAnnotations(readOnlyHint=False, destructiveHint=False)
 
-    return [
+    return (
         mcp_types.Tool(
             name="retrieve_context",
             description="Retrieve semantically relevant USF context from the Supabase vector store.",
@@ -459,7 +473,7 @@ def _tool_definitions() -> list[mcp_types.Tool]:
             },
             annotations=annotations_mutating,
         ),
-    ]
+    )
 
 def build_mcp_server(runtime: Optional[_ToolRuntime] = None) -> Server:
     """
@@ -476,8 +490,8 @@ def build_mcp_server(runtime: Optional[_ToolRuntime] = None) -> Server:
 
     @server.list_tools()
     async def _list_tools() -> list[mcp_types.Tool]:
-        # Return deep copies to avoid accidental mutation between requests
-        return [tool.model_copy(deep=True) for tool in tools]
+        # The catalog is static and only serialized downstream, so share the instances
+        return list(tools)
 
     @server.call_tool()
     async def _call_tool(tool_name: str, arguments: Optional[dict[str, Any]]):
@@ -498,87 +512,102 @@ async def _run_blocking(func, *args, **kwargs):
         return func(*args, **kwargs)
     return await anyio.to_thread.run_sync(func, *args, **kwargs)
 
-async def _execute_tool(runtime: _ToolRuntime, tool_name: str, args: dict[str, Any]):
-    if tool_name == "retrieve_context":
-        hits = await _run_blocking(
-            runtime.retrieve_context,
-            args.get("query"),
-            args.get("match_count"),
-            args.get("extra_filter"),
-        )
-        return {"hits": hits}
-
-    if tool_name == "log_interaction":
-        return await _run_blocking(
-            runtime.log_interaction,
-            args.get("session_id", ""),
-            args.get("event_type", ""),
-            args.get("payload") or {},
-        )
+async def _tool_retrieve_context(runtime: _ToolRuntime, args: dict[str, Any]):
+    hits = await _run_blocking(
+        runtime.retrieve_context,
+        args.get("query"),
+        args.get("match_count"),
+        args.get("extra_filter"),
+    )
+    return {"hits": hits}
+
+async def _tool_log_interaction(runtime: _ToolRuntime, args: dict[str, Any]):
+    # log_event only enqueues for the background writer, so skip the worker-thread hop
+    return runtime.log_interaction(
+        args.get("session_id", ""),
+        args.get("event_type", ""),
+        args.get("payload") or {},
+    )
 
-    if tool_name == "list_calendar_events":
-        events = await _run_blocking(runtime.list_calendar_events, args.get("max_results", 5))
-        return {"events": events}
+async def _tool_list_calendar_events(runtime: _ToolRuntime, args: dict[str, Any]):
+    events = await _run_blocking(runtime.list_calendar_events, args.get("max_results", 5))
+    return {"events": events}
 
-    if tool_name == "list_recent_emails":
-        messages = await _run_blocking(
-            runtime.list_recent_emails,
-            args.get("query", ""),
-            args.get("max_results", 5),
-        )
-        return {"messages": messages}
-
-    if tool_name == "send_email":
-        message_id = await _run_blocking(
-            runtime.send_email,
-            args.get("to_address", ""),
-            args.get("subject", ""),
-            args.get("body", ""),
-        )
-        return {"message_id": message_id}
-
-    if tool_name == "draft_email":
-        draft = await _run_blocking(
-            runtime.draft_email,
-            args.get("student_message", ""),
-            args.get("subject"),
-            args.get("instructions"),
-            args.get("previous_draft"),
-            args.get("session_id"),
-        )
-        return {"draft": draft}
-
-    if tool_name == "plan_meeting":
-        plan = await _run_blocking(
-            runtime.plan_meeting,
-            args.get("summary", ""),
-            args.get("start_iso", ""),
-            int(args.get("duration_minutes", 30)),
-            args.get("attendees"),
-            args.get("agenda", ""),
-            args.get("location", ""),
-            args.get("session_id"),
-        )
-        return {"plan": plan}
-
-    if tool_name == "create_event":
-        event_info = await _run_blocking(
-            runtime.create_event,
-            args.get("summary", ""),
-            args.get("start_iso", ""),
-            int(args.get("duration_minutes", 30)),
-            args.get("attendees"),
-            args.get("description", ""),
-            args.get("location", ""),
-        )
-        if isinstance(event_info, dict):
-            return {
-                "event_id": event_info.get("event_id", ""),
-                "hangout_link": event_info.get("hangout_link", ""),
-            }
-        return {"event_id": event_info or "", "hangout_link": ""}
+async def _tool_list_recent_emails(runtime: _ToolRuntime, args: dict[str, Any]):
+    messages = await _run_blocking(
+        runtime.list_recent_emails,
+        args.get("query", ""),
+        args.get("max_results", 5),
+    )
+    return {"messages": messages}
+
+async def _tool_send_email(runtime: _ToolRuntime, args: dict[str, Any]):
+    message_id = await _run_blocking(
+        runtime.send_email,
+        args.get("to_address", ""),
+        args.get("subject", ""),
+        args.get("body", ""),
+    )
+    return {"message_id": message_id}
+
+async def _tool_draft_email(runtime: _ToolRuntime, args: dict[str, Any]):
+    draft = await _run_blocking(
+        runtime.draft_email,
+        args.get("student_message", ""),
+        args.get("subject"),
+        args.get("instructions"),
+        args.get("previous_draft"),
+        args.get("session_id"),
+    )
+    return {"draft": draft}
+
+async def _tool_plan_meeting(runtime: _ToolRuntime, args: dict[str, Any]):
+    plan = await _run_blocking(
+        runtime.plan_meeting,
+        args.get("summary", ""),
+        args.get("start_iso", ""),
+        int(args.get("duration_minutes", 30)),
+        args.get("attendees"),
+        args.get("agenda", ""),
+        args.get("location", ""),
+        args.get("session_id"),
+    )
+    return {"plan": plan}
+
+async def _tool_create_event(runtime: _ToolRuntime, args: dict[str, Any]):
+    event_info = await _run_blocking(
+        runtime.create_event,
+        args.get("summary", ""),
+        args.get("start_iso", ""),
+        int(args.get("duration_minutes", 30)),
+        args.get("attendees"),
+        args.get("description", ""),
+        args.get("location", ""),
+    )
+    if isinstance(event_info, dict):
+        return {
+            "event_id": event_info.get("event_id", ""),
+            "hangout_link": event_info.get("hangout_link", ""),
+        }
+    return {"event_id": event_info or "", "hangout_link": ""}
+
+# Tool name -> handler; keep in sync with _tool_definitions()
+_TOOL_HANDLERS = {
+    "retrieve_context": _tool_retrieve_context,
+    "log_interaction": _tool_log_interaction,
+    "list_calendar_events": _tool_list_calendar_events,
+    "list_recent_emails": _tool_list_recent_emails,
+    "send_email": _tool_send_email,
+    "draft_email": _tool_draft_email,
+    "plan_meeting": _tool_plan_meeting,
+    "create_event": _tool_create_event,
+}
 
-    raise ValueError(f"Unknown tool: {tool_name}")
+async def _execute_tool(runtime: _ToolRuntime, tool_name: str, args: dict[str, Any]):
+    handler = _TOOL_HANDLERS.get(tool_name)
+    if handler is None:
+        raise ValueError(f"Unknown tool: {tool_name}")
+    return await handler(runtime, args)
 
 async def run_mcp_server(
     chat_db: Optional[ChatDatabase] = None,
@@ -599,10 +628,11 @@ async def run_mcp_server(
 
 class SimpleMCPClient:
     """
-    MCP client with optimized single-session calls.
+    MCP client backed by one long-lived stdio session.
 
-    Each tool call reuses the same subprocess session for the duration
-    of that call, avoiding repeated subprocess spawning overhead.
+    The server subprocess is spawned and initialized on the first tool call,
+    then kept open on a background event-loop thread and shared by every
+    later call until close().
     """
 
     def __init__(
@@ -621,6 +651,8 @@ class SimpleMCPClient:
             raise RuntimeError("MCP has been disabled via USF_DISABLE_MCP=1.")
 
         self._runtime = _ToolRuntime(chat_db=chat_db, google_tools=google_tools)
+        # Opt-in: run tool handlers against self._runtime instead of the stdio server
+        self._inprocess = os.getenv("USF_MCP_INPROCESS", "0") == "1"
         self._server_command = list(server_command or DEFAULT_SERVER_CMD)
         self._server_cwd = Path(server_cwd or DEFAULT_SERVER_CWD)
         env = dict(os.environ)
@@ -635,35 +667,111 @@ class SimpleMCPClient:
             cwd=str(self._server_cwd),
         )
 
+        # Persistent session state, created lazily by _ensure_session()
+        self._session_lock = threading.Lock()
+        self._portal_cm = None
+        self._portal = None
+        self._session_cm = None
+        self._session = None
+        atexit.register(self.close)
+
+        # retrieve_context results keyed by (query, match_count, filter) -> (stored_at, hits)
+        self._retrieve_cache: OrderedDict[tuple, tuple[float, list[dict[str, Any]]]] = OrderedDict()
+        self._retrieve_inflight: dict[tuple, Future] = {}
+        self._retrieve_cache_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def _open_session(self):
+        async with stdio_client(self._stdio_params) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                # Initialize MCP protocol once per subprocess (skip list_tools for speed)
+                await session.initialize()
+                yield session
+
+    def _ensure_session(self):
+        """Return (portal, session), spawning the server subprocess on first use."""
+        with self._session_lock:
+            if self._session is None:
+                portal_cm = anyio.from_thread.start_blocking_portal()
+                portal = portal_cm.__enter__()
+                try:
+                    session_cm = portal.wrap_async_context_manager(self._open_session())
+                    session = session_cm.__enter__()
+                except BaseException:
+                    portal_cm.__exit__(None, None, None)
+                    raise
+                self._portal_cm, self._portal = portal_cm, portal
+                self._session_cm, self._session = session_cm, session
+            return self._portal, self._session
+
+    def close(self) -> None:
+        """Shut down the shared session and its server subprocess, if running."""
+        with self._session_lock:
+            session_cm, portal_cm = self._session_cm, self._portal_cm
+            self._portal_cm = self._portal = self._session_cm = self._session = None
+        if session_cm is not None:
+            try:
+                session_cm.__exit__(None, None, None)
+            except Exception as exc:
+                logger.warning("Error closing MCP session: %s", exc)
+        if portal_cm is not None:
+            try:
+                portal_cm.__exit__(None, None, None)
+            except Exception as exc:
+                logger.warning("Error stopping MCP event loop: %s", exc)
+
     def _call_tool(self, tool_name: str, arguments: dict[str, Any], timeout: float = 120.0):
         """
-        Call MCP tool via stdio transport.
-        Optimized to skip unnecessary list_tools() call.
+        Call MCP tool over the shared stdio session.
+        A session whose transport was already closed is reopened once. The session
+        is only torn down on transport failure, never for one call's timeout or
+        error, since other users' calls may be in flight on it.
         """
+        if self._inprocess:
+            return self._call_tool_inprocess(tool_name, arguments)
         if not self._stdio_params:
             raise RuntimeError("MCP transport has not been initialised.")
 
-        async def _call():
-            # Create session for this call (subprocess reused if warm)
+        async def _call(session):
+            with anyio.fail_after(timeout):
+                return await session.call_tool(tool_name, arguments)
+
+        for attempt in range(2):
+            portal, session = self._ensure_session()
             try:
-                with anyio.fail_after(timeout):
-                    async with stdio_client(self._stdio_params) as (read_stream, write_stream):
-                        async with ClientSession(read_stream, write_stream) as session:
-                            # Initialize MCP protocol
-                            await session.initialize()
-                            # Call tool directly (skip list_tools for speed)
-                            return await session.call_tool(tool_name, arguments)
+                result = portal.call(_call, session)
+                break
             except TimeoutError as exc:
+                # fail_after cancelled just this request; the session stays up
                 raise RuntimeError(
                     f"MCP tool '{tool_name}' timed out after {timeout}s. "
                     "The subprocess may be unresponsive or stuck."
                 ) from exc
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                # Request never reached the server (dead subprocess); safe to retry on a fresh one
+                self.close()
+                if attempt:
+                    raise RuntimeError(f"MCP server connection lost while calling '{tool_name}'.")
+            except McpError as exc:
+                if exc.error.code == mcp_types.CONNECTION_CLOSED:
+                    # Server exited mid-call; the request may have run, so drop the session but don't retry
+                    self.close()
+                raise
 
-        result = anyio.run(_call)
         if result.isError:
             raise RuntimeError(_extract_error(result))
         return result
 
+    def _call_tool_inprocess(self, tool_name: str, arguments: dict[str, Any]):
+        """Run the same handler the MCP server would, without JSON-RPC or a subprocess."""
+        try:
+            structured = anyio.run(_execute_tool, self._runtime, tool_name, arguments)
+        except Exception as exc:
+            # Mirror the server's error text so callers see the same RuntimeError either way
+            logger.exception("Tool %s failed", tool_name)
+            raise RuntimeError(f"{tool_name} failed: {exc}") from exc
+        return mcp_types.CallToolResult(content=[], structuredContent=structured, isError=False)
+
     @staticmethod
     def _structured(result, key: str, default: Any):
         """Extract structured data from MCP result."""
@@ -677,16 +785,48 @@ class SimpleMCPClient:
         match_count: Optional[int] = None,
         extra_filter: Optional[dict[str, Any]] = None,
     ) -> list[dict[str, Any]]:
-        """Retrieve context via MCP retrieve_context tool."""
+        """Retrieve context via MCP retrieve_context tool, reusing recent identical lookups."""
         if not query:
             raise ValueError("query is required")
-        payload = {"query": query}
-        if match_count is not None:
-            payload["match_count"] = match_count
-        if extra_filter:
-            payload["extra_filter"] = extra_filter
-        result = self._call_tool("retrieve_context", payload)
-        return self._structured(result, "hits", [])
+        cache_key = (query, match_count, json.dumps(extra_filter, sort_keys=True) if extra_filter else None)
+        now = time.monotonic()
+        with self._retrieve_cache_lock:
+            cached = self._retrieve_cache.get(cache_key)
+            if cached and now - cached[0] < RETRIEVE_CACHE_TTL:
+                self._retrieve_cache.move_to_end(cache_key)
+                return list(cached[1])
+            # Single-flight: concurrent identical lookups wait on the first caller's request
+            pending = self._retrieve_inflight.get(cache_key)
+            owner = pending is None
+            if owner:
+                pending = self._retrieve_inflight[cache_key] = Future()
+
+        if not owner:
+            return list(pending.result())
+
+        try:
+            payload = {"query": query}
+            if match_count is not None:
+                payload["match_count"] = match_count
+            if extra_filter:
+                payload["extra_filter"] = extra_filter
+            result = self._call_tool("retrieve_context", payload)
+            hits = self._structured(result, "hits", [])
+        except BaseException as exc:
+            with self._retrieve_cache_lock:
+                self._retrieve_inflight.pop(cache_key, None)
+            pending.set_exception(exc)
+            raise
+
+        with self._retrieve_cache_lock:
+            if RETRIEVE_CACHE_SIZE > 0:
+                self._retrieve_cache[cache_key] = (now, hits)
+                self._retrieve_cache.move_to_end(cache_key)
+                while len(self._retrieve_cache) > RETRIEVE_CACHE_SIZE:
+                    self._retrieve_cache.popitem(last=False)
+            self._retrieve_inflight.pop(cache_key, None)
+        pending.set_result(hits)
+        return list(hits)
 
     def log_interaction(self, session_id: str, event_type: str, payload: dict[str, Any]) -> None:
         """
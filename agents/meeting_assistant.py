@@ -1,8 +1,10 @@
 """Meeting assistant logic for planning and creating calendar events."""
+import re
 import streamlit as st
 from typing import Any
-from utils.rag import estimate_tokens
-from utils.state_manager import queue_action_collapse
+from utils.state_manager import queue_action_collapse, record_assistant_message
+
+_ATTENDEE_SPLIT = re.compile(r"\s*[,;]\s*")
 
 
 def plan_meeting(
@@ -27,7 +29,7 @@ def plan_meeting(
         st.warning("Enter a start date/time (ISO format) to check availability.")
         return
 
-    attendees = [email.strip() for email in attendee_raw.split(",") if email.strip()]
+    attendees = [email for email in _ATTENDEE_SPLIT.split(attendee_raw.strip()) if email]
 
     try:
         plan = mcp_client.plan_meeting(
@@ -111,18 +113,12 @@ def create_meeting_event(mcp_client, db) -> None:
     with st.chat_message("assistant"):
         st.success(confirmation)
 
-    out_toks = estimate_tokens(confirmation)
-    st.session_state.messages.append({"role": "assistant", "content": confirmation})
-    db.add_message(
-        st.session_state.current_session_id,
-        "assistant",
+    record_assistant_message(
+        db,
+        mcp_client,
         confirmation,
-        tokens_out=out_toks,
-    )
-    mcp_client.log_interaction(
-        st.session_state.current_session_id,
-        "meeting_created",
-        {
+        log_kind="meeting_created",
+        log_payload={
             "summary": plan["summary"],
             "start": plan["start"],
             "duration": plan["duration"],
@@ -188,7 +184,6 @@ def apply_meeting_edit(mcp_client, db, instructions: str) -> None:
     # Update plan and sync to text area (don't add to chat history)
     plan["ai_notes"] = revised_notes
     plan["description"] = revised_notes
-    st.session_state.pending_meeting = plan
     st.session_state.meeting_notes_sync_value = revised_notes
 
     # Log interaction but don't add to chat history
@@ -209,6 +204,5 @@ def save_manual_meeting_edit(text: str) -> bool:
 
     plan["description"] = text
     plan["ai_notes"] = text
-    st.session_state.pending_meeting = plan
     st.session_state.meeting_notes_sync_value = None
     return True
@@ -29,8 +29,9 @@ from utils.state_manager import (
     initialize_session_state,
     handle_pending_action_collapses,
     maybe_auto_open_assistant,
+    record_assistant_message,
 )
-from utils.formatters import format_est_timestamp
+from utils.formatters import format_est_epoch, format_est_timestamp
 from components.assistants import (
     render_tool_picker,
     render_email_builder,
@@ -42,10 +43,72 @@ load_dotenv()
 
 SESSION_TOKEN_LIMIT = int(os.environ.get("SESSION_TOKEN_LIMIT", "1500"))
 
-# Initialize services
-db = ChatDatabase()
-google_tools = GoogleWorkspaceTools()
-mcp_client = SimpleMCPClient(chat_db=db, google_tools=google_tools)
+# Initialize services once per server process rather than on every rerun
+@st.cache_resource(show_spinner=False)
+def get_db() -> ChatDatabase:
+    return ChatDatabase()
+
+
+@st.cache_resource(show_spinner=False)
+def get_google_tools() -> GoogleWorkspaceTools:
+    return GoogleWorkspaceTools()
+
+
+@st.cache_resource(show_spinner=False)
+def get_mcp_client() -> SimpleMCPClient:
+    return SimpleMCPClient(chat_db=get_db(), google_tools=get_google_tools())
+
+
+db = get_db()
+google_tools = get_google_tools()
+mcp_client = get_mcp_client()
+
+
+# Short-lived read caches so widget reruns don't re-query Supabase.
+# The cached fetchers raise on query errors so a failed read is never cached.
+@st.cache_data(ttl=5, show_spinner=False)
+def _fetch_user_sessions(user_id: str) -> list[dict]:
+    return db.get_user_sessions_with_counts(user_id, raise_errors=True)
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _fetch_session_search(user_id: str, query: str) -> list[dict]:
+    return db.search_sessions(user_id, query, raise_errors=True)
+
+
+def load_user_sessions(user_id: str) -> list[dict]:
+    try:
+        return _fetch_user_sessions(user_id)
+    except Exception:
+        return []  # already logged by ChatDatabase
+
+
+def load_session_search(user_id: str, query: str) -> list[dict]:
+    try:
+        return _fetch_session_search(user_id, query)
+    except Exception:
+        return []
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_session_export(user_id: str, session_id: str, message_count: int) -> str:
+    # message_count is part of the cache key so new turns produce a fresh export
+    return db.export_session_json(user_id, session_id)
+
+
+def invalidate_session_caches() -> None:
+    """Drop this user's cached session reads after their sessions or messages change."""
+    state = st.session_state
+    user_id = state.user_id
+    _fetch_user_sessions.clear(user_id)
+    # Other cached queries for this user expire on the 5s TTL
+    search_query = sanitize_user_input(state.get("search_input", ""))
+    if search_query:
+        _fetch_session_search.clear(user_id, search_query)
+    if state.get("current_session_id"):
+        # Renames change the export without changing the message count
+        load_session_export.clear(user_id, state.current_session_id, len(state.messages))
+    state.session_caches_stale = False
 
 # Persist auth across reruns
 if "auth" not in st.session_state:
@@ -67,12 +130,63 @@ initialize_session_state()
 
 
 def recompute_token_total(msgs: list[dict]) -> int:
-    """Count only user+assistant tokens for the session budget."""
-    return sum(
-        estimate_tokens(m.get("content", ""))
-        for m in msgs
-        if m.get("role") in ("user", "assistant")
-    )
+    """Sum user+assistant tokens for the session budget."""
+    total = 0
+    for m in msgs:
+        tokens = m.get("tokens")
+        if tokens is None:
+            tokens = m["tokens"] = estimate_tokens(m.get("content", ""))
+        total += tokens
+    return total
+
+
+def build_session_messages(rows: list[dict]) -> list[dict]:
+    """Rebuild chat history from stored rows, reusing their recorded token counts."""
+    return [
+        {
+            "role": row["role"],
+            "content": row["content"],
+            "tokens": row.get("tokens_in") or row.get("tokens_out"),
+        }
+        for row in rows
+    ]
+
+
+@st.fragment
+def render_session_list(user_sessions: list[dict]) -> None:
+    """Sidebar search + session buttons; typing a search reruns only this fragment."""
+    # Search
+    search_query = sanitize_user_input(st.text_input("🔍 Search sessions", key="search_input"))
+
+    # Filter sessions
+    if search_query:
+        sessions = load_session_search(st.session_state.user_id, search_query)
+    else:
+        sessions = user_sessions
+
+    if sessions:
+        st.markdown(f"### 📁 Sessions ({len(sessions)})")
+
+        with st.container(height=435, border=True):
+            for session in sessions:
+                session_id = session.get("id")
+                is_current = session_id == st.session_state.current_session_id
+                button_type = "primary" if is_current else "secondary"
+                if st.button(
+                    f"💬 {session['session_name']}",
+                    key=f"session_{session_id}",
+                    use_container_width=True,
+                    type=button_type,
+                ):
+                    st.session_state.current_session_id = session_id
+                    db_messages = db.get_session_messages(session_id)
+                    st.session_state.messages = build_session_messages(db_messages)
+                    st.session_state.token_total = recompute_token_total(st.session_state.messages)
+                    st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
+                    # Opening a session changes the main area, so rerun the whole app
+                    st.rerun(scope="app")
+    else:
+        st.info("No sessions found")
 
 
 # Handle pending login (after user submits login form)
@@ -195,6 +309,14 @@ if not st.session_state.authenticated:
 
 # Main Application
 else:
+    # Assistant confirmations write through record_assistant_message, which flags this
+    if st.session_state.get("session_caches_stale"):
+        invalidate_session_caches()
+
+    # Fetched once per rerun and shared by the sidebar, chat area, and dashboard
+    user_sessions = load_user_sessions(st.session_state.user_id)
+    sessions_by_id = {s["id"]: s for s in user_sessions}
+
     # Sidebar
     with st.sidebar:
         # Show processing message at top when processing
@@ -226,51 +348,18 @@ else:
                 from datetime import datetime
                 session_name = f"Chat {datetime.now().strftime('%b %d, %H:%M')}"
                 sid = db.create_session(st.session_state.user_id, session_name)
+                invalidate_session_caches()
                 if not sid:
                     st.error("Unable to create a new session. Please try again.")
                 else:
                     st.session_state.current_session_id = sid
-                    st.session_state.messages = [
-                        {"role": "system", "content": "Assistant configured."}
-                    ]
+                    st.session_state.messages = []
                     st.session_state.token_total = 0
                     st.session_state.limit_reached = False
                     st.session_state.show_dashboard = False
                     st.rerun()
 
-            # Search
-            search_query = sanitize_user_input(st.text_input("🔍 Search sessions", key="search_input"))
-
-            # Filter sessions
-            sessions = db.search_sessions(st.session_state.user_id, search_query)
-
-            if sessions:
-                st.markdown(f"### 📁 Sessions ({len(sessions)})")
-
-                with st.container(height=435, border=True):
-                    for session in sessions:
-                        session_id = session.get("id")
-                        is_current = session_id == st.session_state.current_session_id
-                        button_type = "primary" if is_current else "secondary"
-                        if st.button(
-                            f"💬 {session['session_name']}",
-                            key=f"session_{session_id}",
-                            use_container_width=True,
-                            type=button_type,
-                        ):
-                            st.session_state.current_session_id = session_id
-                            db_messages = db.get_session_messages(session_id)
-                            st.session_state.messages = [
-                                {"role": "system", "content": "Assistant configured."}
-                            ] + [
-                                {"role": msg["role"], "content": msg["content"]}
-                                for msg in db_messages
-                            ]
-                            st.session_state.token_total = recompute_token_total(st.session_state.messages)
-                            st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                            st.rerun()
-            else:
-                st.info("No sessions found")
+            render_session_list(user_sessions)
         else:
             # Show disabled buttons when processing
             st.button("🚪 Logout", use_container_width=True, disabled=True)
@@ -279,7 +368,7 @@ else:
             st.text_input("🔍 Search sessions", key="search_input_disabled", disabled=True)
 
             # Render sessions list with disabled buttons
-            sessions = db.get_user_sessions(st.session_state.user_id)
+            sessions = user_sessions
             if sessions:
                 st.markdown(f"### 📁 Sessions ({len(sessions)})")
                 with st.container(height=435, border=True):
@@ -299,8 +388,7 @@ else:
 
     # Main Chat Area
     if st.session_state.current_session_id:
-        sessions = db.get_user_sessions(st.session_state.user_id)
-        current_session = next((s for s in sessions if s.get("id") == st.session_state.current_session_id), None)
+        current_session = sessions_by_id.get(st.session_state.current_session_id)
 
         if current_session:
             # Check if user is a demo user
@@ -322,7 +410,7 @@ else:
                 st.title(current_session["session_name"])
 
             with col2:
-                msg_count = len(st.session_state.messages) - 1
+                msg_count = len(st.session_state.messages)
                 st.metric("Messages", msg_count)
 
             with col3:
@@ -341,13 +429,15 @@ else:
                             final_name = sanitize_user_input((rename_value or default_name).strip())
                             if final_name != default_name:
                                 db.rename_session(st.session_state.current_session_id, final_name)
+                                invalidate_session_caches()
                             st.rerun()
 
                         st.divider()
 
-                        export_json = db.export_session_json(
+                        export_json = load_session_export(
                             st.session_state.user_id,
                             st.session_state.current_session_id,
+                            len(st.session_state.messages),
                         )
                         st.download_button(
                             "⬇️ Export",
@@ -360,6 +450,7 @@ else:
 
                         if st.button("🗑️ Delete session", key=f"{options_prefix}_delete", use_container_width=True):
                             db.delete_session(st.session_state.current_session_id)
+                            invalidate_session_caches()
                             st.session_state.current_session_id = None
                             st.session_state.messages = []
                             st.session_state.token_total = 0
@@ -423,7 +514,7 @@ else:
         chat_col = st.container()
 
         with chat_col:
-            history = st.session_state.messages[1:]
+            history = st.session_state.messages
             show_welcome = (
                 not history
                 and not st.session_state.show_tool_picker
@@ -580,12 +671,15 @@ else:
             if is_injection(clean):
                 warn = "That looks like a prompt-injection attempt. For safety, I can't run that. Try a normal question."
                 thinking_placeholder.markdown(warn)
-                out_toks = estimate_tokens(warn)
-                st.session_state.token_total += (in_toks + out_toks)
+                record_assistant_message(
+                    db,
+                    mcp_client,
+                    warn,
+                    log_kind="injection_blocked",
+                    log_payload={"prompt": clean, "response": warn},
+                )
+                st.session_state.token_total += in_toks
                 st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                st.session_state.messages.append({"role": "assistant", "content": warn})
-                db.add_message(st.session_state.current_session_id, "assistant", warn, tokens_out=out_toks)
-                mcp_client.log_interaction(st.session_state.current_session_id, "injection_blocked", {"prompt": clean, "response": warn})
             else:
                 # Generate new response
                 try:
@@ -594,12 +688,13 @@ else:
                     matched_chunks = []
                     last_chunk = ""
 
+                    update = streamer.update
                     for kind, payload in generate_with_rag(clean, mcp_client=mcp_client):
-                        text = payload.get("text", "")
+                        text = payload.get("text")
                         if not text:
                             continue
                         last_chunk = text
-                        streamer.update(text)
+                        update(text)
                         if kind != "delta":
                             final_text = text
                             matched_chunks = payload.get("hits", [])
@@ -610,34 +705,40 @@ else:
 
                     if final_text:
                         out_toks = estimate_tokens(final_text)
-                        st.session_state.token_total += (in_toks + out_toks)
-                        st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                        st.session_state.messages.append({"role": "assistant", "content": final_text})
-                        db.add_message(st.session_state.current_session_id, "assistant", final_text, tokens_out=out_toks)
-                        mcp_client.log_interaction(
-                            st.session_state.current_session_id,
-                            "regenerate_response",
-                            {"prompt": clean, "response": final_text, "chunks": matched_chunks, "tokens_in": in_toks, "tokens_out": out_toks}
+                        record_assistant_message(
+                            db,
+                            mcp_client,
+                            final_text,
+                            log_kind="regenerate_response",
+                            log_payload={"prompt": clean, "response": final_text, "chunks": matched_chunks, "tokens_in": in_toks, "tokens_out": out_toks},
+                            tokens=out_toks,
                         )
+                        st.session_state.token_total += in_toks
+                        st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
                         maybe_auto_open_assistant(final_text)
                     else:
                         error_msg = "We weren't able to generate a response. Please try again."
                         thinking_placeholder.markdown(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                        db.add_message(st.session_state.current_session_id, "assistant", error_msg, tokens_out=estimate_tokens(error_msg))
+                        out_toks = estimate_tokens(error_msg)
+                        st.session_state.messages.append({"role": "assistant", "content": error_msg, "tokens": out_toks})
+                        db.add_message(st.session_state.current_session_id, "assistant", error_msg, tokens_out=out_toks)
                         mcp_client.log_interaction(st.session_state.current_session_id, "assistant_error", {"prompt": clean, "error": "empty_response"})
                 except RuntimeError as e:
                     # Catch content filter blocks and other Azure errors
                     error_msg = str(e)
                     thinking_placeholder.markdown(error_msg)
-                    out_toks = estimate_tokens(error_msg)
-                    st.session_state.token_total += (in_toks + out_toks)
+                    record_assistant_message(
+                        db,
+                        mcp_client,
+                        error_msg,
+                        log_kind="content_filter_block",
+                        log_payload={"prompt": clean, "error": error_msg},
+                    )
+                    st.session_state.token_total += in_toks
                     st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                    db.add_message(st.session_state.current_session_id, "assistant", error_msg, tokens_out=out_toks)
-                    mcp_client.log_interaction(st.session_state.current_session_id, "content_filter_block", {"prompt": clean, "error": error_msg})
 
             # Clear regeneration state
+            invalidate_session_caches()
             st.session_state.pending_regen = False
             st.session_state.is_processing = False
             st.rerun()
@@ -734,8 +835,8 @@ else:
             clean = sanitize_user_input(st.session_state.pending_user_input)
             in_toks = estimate_tokens(clean)
 
-            # Add user message
-            st.session_state.messages.append({"role": "user", "content": clean})
+            # Add user message (saved before generating so a failed reply can't lose it)
+            st.session_state.messages.append({"role": "user", "content": clean, "tokens": in_toks})
             db.add_message(st.session_state.current_session_id, "user", clean, tokens_in=in_toks)
 
             with chat_col:
@@ -750,12 +851,15 @@ else:
             if is_injection(clean):
                 warn = "That looks like a prompt-injection attempt. For safety, I can't run that. Try a normal question."
                 thinking_placeholder.markdown(warn)
-                out_toks = estimate_tokens(warn)
-                st.session_state.token_total += (in_toks + out_toks)
+                record_assistant_message(
+                    db,
+                    mcp_client,
+                    warn,
+                    log_kind="injection_blocked",
+                    log_payload={"prompt": clean, "response": warn},
+                )
+                st.session_state.token_total += in_toks
                 st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                st.session_state.messages.append({"role": "assistant", "content": warn})
-                db.add_message(st.session_state.current_session_id, "assistant", warn, tokens_out=out_toks)
-                mcp_client.log_interaction(st.session_state.current_session_id, "injection_blocked", {"prompt": clean, "response": warn})
             else:
                 # Generate response with RAG
                 try:
@@ -764,12 +868,13 @@ else:
                     matched_chunks = []
                     last_chunk = ""
 
+                    update = streamer.update
                     for kind, payload in generate_with_rag(clean, mcp_client=mcp_client):
-                        text = payload.get("text", "")
+                        text = payload.get("text")
                         if not text:
                             continue
                         last_chunk = text
-                        streamer.update(text)
+                        update(text)
                         if kind != "delta":
                             final_text = text
                             matched_chunks = payload.get("hits", [])
@@ -780,34 +885,40 @@ else:
 
                     if final_text:
                         out_toks = estimate_tokens(final_text)
-                        st.session_state.token_total += (in_toks + out_toks)
-                        st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                        st.session_state.messages.append({"role": "assistant", "content": final_text})
-                        db.add_message(st.session_state.current_session_id, "assistant", final_text, tokens_out=out_toks)
-                        mcp_client.log_interaction(
-                            st.session_state.current_session_id,
-                            "assistant_reply",
-                            {"prompt": clean, "response": final_text, "chunks": matched_chunks, "tokens_in": in_toks, "tokens_out": out_toks}
+                        record_assistant_message(
+                            db,
+                            mcp_client,
+                            final_text,
+                            log_kind="assistant_reply",
+                            log_payload={"prompt": clean, "response": final_text, "chunks": matched_chunks, "tokens_in": in_toks, "tokens_out": out_toks},
+                            tokens=out_toks,
                         )
+                        st.session_state.token_total += in_toks
+                        st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
                         maybe_auto_open_assistant(final_text)
                     else:
                         error_msg = "We weren't able to generate a response. Please try again."
                         thinking_placeholder.markdown(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                        db.add_message(st.session_state.current_session_id, "assistant", error_msg, tokens_out=estimate_tokens(error_msg))
+                        out_toks = estimate_tokens(error_msg)
+                        st.session_state.messages.append({"role": "assistant", "content": error_msg, "tokens": out_toks})
+                        db.add_message(st.session_state.current_session_id, "assistant", error_msg, tokens_out=out_toks)
                         mcp_client.log_interaction(st.session_state.current_session_id, "assistant_error", {"prompt": clean, "error": "empty_response"})
                 except RuntimeError as e:
                     # Catch content filter blocks and other Azure errors
                     error_msg = str(e)
                     thinking_placeholder.markdown(error_msg)
-                    out_toks = estimate_tokens(error_msg)
-                    st.session_state.token_total += (in_toks + out_toks)
+                    record_assistant_message(
+                        db,
+                        mcp_client,
+                        error_msg,
+                        log_kind="content_filter_block",
+                        log_payload={"prompt": clean, "error": error_msg},
+                    )
+                    st.session_state.token_total += in_toks
                     st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                    db.add_message(st.session_state.current_session_id, "assistant", error_msg, tokens_out=out_toks)
-                    mcp_client.log_interaction(st.session_state.current_session_id, "content_filter_block", {"prompt": clean, "error": error_msg})
 
             # Clear processing state
+            invalidate_session_caches()
             st.session_state.pending_user_input = None
             st.session_state.is_processing = False
             st.rerun()
@@ -822,7 +933,7 @@ else:
         handle_pending_action_collapses()
 
         # Stats
-        sessions = db.get_user_sessions(st.session_state.user_id)
+        sessions = user_sessions
 
         col1, col2 = st.columns(2)
 
@@ -830,8 +941,8 @@ else:
             st.metric("📁 Total Sessions", len(sessions))
 
         with col2:
-            # Optimized: Single query instead of N queries
-            total_messages = db.get_total_message_count(st.session_state.user_id)
+            # Counts arrive with the session list, so no extra query
+            total_messages = sum(s.get("message_count", 0) for s in sessions)
             st.metric("💬 Total Messages", total_messages)
 
         st.divider()
@@ -843,8 +954,7 @@ else:
             if sessions:
                 for session in sessions[:5]:
                     session_id = session.get("id")
-                    messages = db.get_session_messages(session_id)
-                    msg_count = len(messages)
+                    msg_count = session.get("message_count", 0)
                     created_label = format_est_timestamp(session.get("created_at"))
                     updated_label = format_est_timestamp(session.get("updated_at"))
                     header = f"💬 {session['session_name']}"
@@ -857,12 +967,7 @@ else:
 
                         if st.button("Open", key=f"open_{session_id}"):
                             st.session_state.current_session_id = session_id
-                            st.session_state.messages = [
-                                {"role": "system", "content": "Assistant configured."}
-                            ] + [
-                                {"role": msg["role"], "content": msg["content"]}
-                                for msg in messages
-                            ]
+                            st.session_state.messages = build_session_messages(db.get_session_messages(session_id))
                             st.session_state.token_total = recompute_token_total(st.session_state.messages)
                             st.session_state.limit_reached = st.session_state.token_total >= SESSION_TOKEN_LIMIT
                             st.session_state.show_dashboard = False
@@ -874,7 +979,7 @@ else:
                 st.subheader("📝 Recent Assisted Actions")
                 for idx, action in enumerate(st.session_state.recent_actions):
                     data = action.get("data", {})
-                    timestamp_label = format_est_timestamp(action.get("timestamp"))
+                    timestamp_label = format_est_epoch(action.get("timestamp"))
                     if action.get("type") == "email":
                         label = f"Email to {data.get('to', '(unknown)')} • {timestamp_label}"
                     else:
@@ -10,38 +10,35 @@ from agents.email_assistant import (
 )
 from agents.meeting_assistant import plan_meeting, create_meeting_event
 
+_TOOL_PICKER_HTML = """
+<div class="tool-picker-card">
+    <div class="tool-picker-title" role="heading" aria-level="4">Assisted Actions</div>
+    <p class="tool-picker-subtitle">Choose an assistant to draft outreach or schedule meetings.</p>
+</div>
+"""
+_MEETING_TZ_OPTIONS = tuple(MEETING_TIMEZONE_OFFSETS)
+
 
 def render_tool_picker() -> None:
     """Render the tool picker with email and meeting assistant options."""
-    st.markdown(
-        """
-        <div class="tool-picker-card">
-            <div class="tool-picker-title" role="heading" aria-level="4">Assisted Actions</div>
-            <p class="tool-picker-subtitle">Choose an assistant to draft outreach or schedule meetings.</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_TOOL_PICKER_HTML, unsafe_allow_html=True)
 
     tool_col1, tool_col2 = st.columns(2)
 
-    with tool_col1:
-        st.markdown("<div class='assistant-card'>", unsafe_allow_html=True)
+    # Keyed containers render with an st-key-assistant-card-* class for styling
+    with tool_col1, st.container(key="assistant-card-email"):
         if st.button("📧 Email Assistant", key="picker_email", use_container_width=True):
             st.session_state.show_email_builder = True
             st.session_state.show_meeting_builder = False
             st.session_state.show_tool_picker = False
             st.rerun()
-        st.markdown("</div>", unsafe_allow_html=True)
 
-    with tool_col2:
-        st.markdown("<div class='assistant-card'>", unsafe_allow_html=True)
+    with tool_col2, st.container(key="assistant-card-meeting"):
         if st.button("📅 Meeting Assistant", key="picker_meeting", use_container_width=True):
             st.session_state.show_meeting_builder = True
             st.session_state.show_email_builder = False
             st.session_state.show_tool_picker = False
             st.rerun()
-        st.markdown("</div>", unsafe_allow_html=True)
 
 
 def render_email_builder(mcp_client, db) -> None:
@@ -173,7 +170,7 @@ def render_meeting_builder(mcp_client, db) -> None:
         col_dt.date_input("Meeting Date", key="meeting_date_input")
         col_tm.time_input("Start Time", key="meeting_time_input", step=300)
 
-        st.selectbox("Timezone", options=list(MEETING_TIMEZONE_OFFSETS.keys()), key="meeting_timezone_input")
+        st.selectbox("Timezone", options=_MEETING_TZ_OPTIONS, key="meeting_timezone_input")
         st.number_input("Duration (minutes)", min_value=15, max_value=240, key="meeting_duration_input")
         st.text_input("Attendees (comma-separated)", key="meeting_attendees_input")
         st.text_input("Location (optional)", key="meeting_location_input")
@@ -46,10 +46,14 @@ MD_EXT = {".md"}
 _WS = re.compile(r"[ \t\f\v]+")
 _NL = re.compile(r"\n{3,}")
 PARA_BREAK = re.compile(r"\n\s*\n")
-BULLET = re.compile(r"^\s*(?:[\u2022\-\*\u25E6]|\d+\.)\s+")
-HEADER = re.compile(r"^#{1,6}\s+")
+# Header or bullet line: either one starts its own output line
+BLOCK_START = re.compile(r"^(?:#{1,6}\s+|\s*(?:[\u2022\-\*\u25E6]|\d+\.)\s+)")
 YAML_FRONT = re.compile(r"^---\s*\n.*?\n---\s*\n", re.S)
 USF_LINK = re.compile(r"https?://(?:www\.)?usf\.edu[^\s\]\)]+", re.I)
+# Embedding-text cleanup (see _format_for_embedding)
+ANY_URL = re.compile(r"https?://\S+")
+EMPTY_MD_LINK = re.compile(r"\[([^\]]+)\]\(\)")
+ANY_WS = re.compile(r"\s+")
 
 # Navigation patterns to strip (reduces duplicate pollution)
 SKIP_TO_CONTENT = re.compile(r"\[Skip (?:to|Over) [^\]]+\]\([^\)]+\)", re.I)
@@ -132,12 +136,7 @@ def reflow_paragraphs(text: str) -> str:
             continue
         buf: List[str] = []
         for ln in lines:
-            if HEADER.match(ln):
-                if buf:
-                    out.append(" ".join(buf))
-                    buf = []
-                out.append(ln)
-            elif BULLET.match(ln):
+            if BLOCK_START.match(ln):
                 if buf:
                     out.append(" ".join(buf))
                     buf = []
@@ -294,11 +293,11 @@ def _format_for_embedding(text: str, title: Optional[str]) -> str:
     """
     # Strip URLs - they add noise but no semantic value
     # Keeps: "Visit HART online" but removes: "https://www.hart.org/..."
-    cleaned = re.sub(r'https?://\S+', '', text)
+    cleaned = ANY_URL.sub("", text)
     # Remove markdown link syntax that remains after URL removal
-    cleaned = re.sub(r'\[([^\]]+)\]\(\)', r'\1', cleaned)
+    cleaned = EMPTY_MD_LINK.sub(r"\1", cleaned)
     # Clean up extra whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = ANY_WS.sub(" ", cleaned).strip()
     return cleaned
 
 def iter_md_files(root: Path) -> Iterable[Path]:
@@ -312,12 +311,14 @@ def md_title(text: str, fallback: str) -> str:
     return title[:200]
 
 # embedding + supabase
+_HF_SESSION = requests.Session()
+
 def _hf_request(payload: dict) -> list:
     model = require_env(HUGGINGFACE_MODEL, "HUGGINGFACE_EMBEDDING_MODEL")
     token = require_env(os.getenv("HUGGINGFACEHUB_API_TOKEN"), "HUGGINGFACEHUB_API_TOKEN")
     url = f"https://router.huggingface.co/hf-inference/models/{model}/pipeline/feature-extraction"
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    resp = requests.post(url, headers=headers, json=payload, timeout=120)
+    resp = _HF_SESSION.post(url, headers=headers, json=payload, timeout=120)
     if resp.status_code >= 400:
         raise RuntimeError(f"Hugging Face error ({resp.status_code}): {resp.text}")
     data = resp.json()
@@ -558,16 +559,21 @@ def main():
             print(f"[error] {path}: {e}")
             skipped += 1
 
-    print("\n=== Ingestion Summary ===")
-    print(f"Scanned files : {scanned}")
-    print(f"Chunks added  : {added}")
-    print(f"Skipped       : {skipped}")
+    summary = [
+        "\n=== Ingestion Summary ===",
+        f"Scanned files : {scanned}",
+        f"Chunks added  : {added}",
+        f"Skipped       : {skipped}",
+    ]
     if not args.dry_run:
-        print(f"Supabase URL  : {args.supabase_url}")
-        print(f"Documents tbl : {args.documents_table}")
-        print(f"Chunks tbl    : {args.chunks_table}")
-        print(f"Embed model   : {require_env(HUGGINGFACE_MODEL, 'HUGGINGFACE_EMBEDDING_MODEL')}")
-        print(f"Chunk/Overlap : {args.chunk}/{args.overlap}")
+        summary += [
+            f"Supabase URL  : {args.supabase_url}",
+            f"Documents tbl : {args.documents_table}",
+            f"Chunks tbl    : {args.chunks_table}",
+            f"Embed model   : {require_env(HUGGINGFACE_MODEL, 'HUGGINGFACE_EMBEDDING_MODEL')}",
+            f"Chunk/Overlap : {args.chunk}/{args.overlap}",
+        ]
+    print("\n".join(summary))
 
 if __name__ == "__main__":
     main()
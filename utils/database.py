@@ -1,6 +1,9 @@
 import os
 import uuid
 import json
+import time
+import queue
+import atexit
 import logging
 import threading
 from datetime import datetime
@@ -11,6 +14,12 @@ from utils.security import escape_sql_like
 
 logger = logging.getLogger(__name__)
 
+_SESSION_COLUMNS = "id, user_id, session_name, created_at, updated_at"
+_MESSAGE_COLUMNS = "id, session_id, role, content, tokens_in, tokens_out, created_at"
+_AUDIT_BATCH_WINDOW = 0.1  # seconds
+_AUDIT_BATCH_MAX = 50
+_NO_RELATIONSHIP = "PGRST200"  # PostgREST: no relationship found for an embed
+
 class ChatDatabase:
     """
     Supabase-backed chat persistence for sessions, messages, and audit logs.
@@ -26,6 +35,10 @@ class ChatDatabase:
         self._sessions_table = sessions_table or os.getenv("SUPABASE_SESSIONS_TABLE", "chat_sessions")
         self._messages_table = messages_table or os.getenv("SUPABASE_MESSAGES_TABLE", "messages")
         self._audit_table = audit_table or os.getenv("SUPABASE_AUDIT_TABLE", "audit_logs")
+        self._embedded_counts = True
+        self._audit_queue: queue.Queue[dict[str, Any]] = queue.Queue()
+        self._audit_worker: Optional[threading.Thread] = None
+        self._audit_lock = threading.Lock()
 
     def create_session(self, user_id: str, session_name: str) -> Optional[str]:
         sid = str(uuid.uuid4())
@@ -50,11 +63,11 @@ class ChatDatabase:
             return None
         return None
 
-    def get_user_sessions(self, user_id: str) -> list[dict]:
+    def get_user_sessions(self, user_id: str, *, raise_errors: bool = False) -> list[dict]:
         try:
             resp = (
                 self._client.table(self._sessions_table)
-                .select("*")
+                .select(_SESSION_COLUMNS)
                 .eq("user_id", user_id)
                 .order("updated_at", desc=True)
                 .execute()
@@ -62,13 +75,50 @@ class ChatDatabase:
             return getattr(resp, "data", []) or []
         except Exception as e:
             logger.error(f"Failed to get user sessions for {user_id}: {e}")
+            if raise_errors:
+                raise
             return []
 
+    def get_user_sessions_with_counts(self, user_id: str, *, raise_errors: bool = False) -> list[dict]:
+        """
+        Sessions for a user (newest first), each with a message_count field.
+        Counts come from an embedded aggregate so it's one query, not 1 + N.
+        With raise_errors, query failures propagate instead of returning [].
+        """
+        if self._embedded_counts:
+            try:
+                resp = (
+                    self._client.table(self._sessions_table)
+                    .select(f"{_SESSION_COLUMNS}, {self._messages_table}(count)")
+                    .eq("user_id", user_id)
+                    .order("updated_at", desc=True)
+                    .execute()
+                )
+                sessions = getattr(resp, "data", []) or []
+                for s in sessions:
+                    embedded = s.pop(self._messages_table, None) or [{}]
+                    s["message_count"] = embedded[0].get("count", 0)
+                return sessions
+            except Exception as e:
+                if getattr(e, "code", None) != _NO_RELATIONSHIP:
+                    logger.error(f"Failed to get sessions with counts for {user_id}: {e}")
+                    if raise_errors:
+                        raise
+                    return []
+                # Embedding needs a messages.session_id foreign key; stop trying without one
+                self._embedded_counts = False
+                logger.warning(f"No {self._messages_table}.session_id relationship, counting per session: {e}")
+        sessions = self.get_user_sessions(user_id, raise_errors=raise_errors)
+        counts = self.count_messages_by_session([s["id"] for s in sessions], raise_errors=raise_errors)
+        for s in sessions:
+            s["message_count"] = counts.get(s["id"], 0)
+        return sessions
+
     def get_session(self, session_id: str) -> Optional[dict]:
         try:
             resp = (
                 self._client.table(self._sessions_table)
-                .select("*")
+                .select(_SESSION_COLUMNS)
                 .eq("id", session_id)
                 .limit(1)
                 .execute()
@@ -103,7 +153,7 @@ class ChatDatabase:
         try:
             resp = (
                 self._client.table(self._messages_table)
-                .select("*")
+                .select(_MESSAGE_COLUMNS)
                 .eq("session_id", session_id)
                 .order("created_at", desc=False)
                 .execute()
@@ -142,43 +192,30 @@ class ChatDatabase:
             logger.error(f"Failed to add message to session {session_id}: {e}")
             return None
 
-    def get_total_message_count(self, user_id: str) -> int:
+    def count_messages_by_session(self, session_ids: list[str], *, raise_errors: bool = False) -> dict[str, int]:
         """
-        Get total message count across all sessions for a user (optimized).
-        Uses a single query instead of N queries.
+        Exact message counts per session. Uses head-only count queries because
+        fetching the rows would be truncated at PostgREST's max-rows limit.
         """
+        counts: dict[str, int] = {}
         try:
-            # Get all session IDs for this user
-            sessions_resp = (
-                self._client.table(self._sessions_table)
-                .select("id")
-                .eq("user_id", user_id)
-                .execute()
-            )
-            session_ids = [s["id"] for s in (getattr(sessions_resp, "data", []) or [])]
-
-            if not session_ids:
-                return 0
-
-            # Count all messages for these sessions in one query
-            # Note: Supabase doesn't support COUNT with filters well, so we fetch and count
-            # This is still faster than N queries
-            messages_resp = (
-                self._client.table(self._messages_table)
-                .select("id", count="exact")
-                .in_("session_id", session_ids)
-                .execute()
-            )
-
-            # Get count from response
-            return getattr(messages_resp, "count", 0) or 0
+            for sid in session_ids:
+                resp = (
+                    self._client.table(self._messages_table)
+                    .select("id", count="exact", head=True)
+                    .eq("session_id", sid)
+                    .execute()
+                )
+                counts[sid] = getattr(resp, "count", 0) or 0
         except Exception as e:
-            logger.error(f"Failed to get total message count for user {user_id}: {e}")
-            return 0
+            logger.error(f"Failed to count messages by session: {e}")
+            if raise_errors:
+                raise
+        return counts
 
     # search/export
-    def search_sessions(self, user_id: str, query: str) -> list[dict]:
-        sessions = self.get_user_sessions(user_id)
+    def search_sessions(self, user_id: str, query: str, *, raise_errors: bool = False) -> list[dict]:
+        sessions = self.get_user_sessions(user_id, raise_errors=raise_errors)
         if not query:
             return sessions
 
@@ -209,6 +246,8 @@ class ChatDatabase:
                         matching_sessions[s.get("id")] = s
         except Exception as e:
             logger.error(f"Failed to search messages: {e}")
+            if raise_errors:
+                raise
 
         return list(matching_sessions.values())
 
@@ -228,24 +267,69 @@ class ChatDatabase:
     def log_event(self, session_id: str, event_type: str, payload: dict[str, Any]) -> None:
         """
         Log an audit event asynchronously (non-blocking).
-        Uses background thread to avoid blocking response times.
+        Events are queued and written by a single background worker thread.
         """
         if not self._audit_table:
             return
+        self._ensure_audit_worker()
+        # Fire and forget - don't block on logging
+        self._audit_queue.put(
+            {
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "event_type": event_type,
+                "payload": payload,
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            }
+        )
+
+    def flush_audit_log(self, timeout: float = 5.0) -> None:
+        """Wait (up to timeout seconds) for queued audit events to be written."""
+        deadline = time.monotonic() + timeout
+        while self._audit_queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _ensure_audit_worker(self) -> None:
+        if self._audit_worker is not None:
+            return
+        with self._audit_lock:
+            if self._audit_worker is None:
+                self._audit_worker = threading.Thread(
+                    target=self._drain_audit_queue, name="audit-log-writer", daemon=True
+                )
+                self._audit_worker.start()
+                atexit.register(self.flush_audit_log)
 
-        def _log_in_background():
+    def _drain_audit_queue(self) -> None:
+        while True:
+            batch = [self._audit_queue.get()]
+            # Collect whatever else arrives within the batching window into one insert
+            deadline = time.monotonic() + _AUDIT_BATCH_WINDOW
+            while len(batch) < _AUDIT_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._audit_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_audit_batch(batch)
+            finally:
+                for _ in batch:
+                    self._audit_queue.task_done()
+
+    def _write_audit_batch(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            self._client.table(self._audit_table).insert(batch).execute()
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Failed to log audit event {batch[0]['event_type']}: {e}")
+                return
+        # One bad row (e.g. a deleted session) fails the whole insert; retry rows singly
+        for record in batch:
             try:
-                record = {
-                    "id": str(uuid.uuid4()),
-                    "session_id": session_id,
-                    "event_type": event_type,
-                    "payload": payload,
-                    "created_at": datetime.utcnow().isoformat(timespec="seconds"),
-                }
                 self._client.table(self._audit_table).insert(record).execute()
             except Exception as e:
-                logger.error(f"Failed to log audit event {event_type} for session {session_id}: {e}")
-
-        # Fire and forget - don't block on logging
-        thread = threading.Thread(target=_log_in_background, daemon=True)
-        thread.start()
\ No newline at end of file
+                logger.error(f"Failed to log audit event {record['event_type']}: {e}")
\ No newline at end of file
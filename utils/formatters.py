@@ -1,18 +1,20 @@
 """Date, time, and text formatting utilities."""
 import re
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional
 from zoneinfo import ZoneInfo
 
 UTC = ZoneInfo("UTC")
 EASTERN = ZoneInfo("America/New_York")
 
-MEETING_TIMEZONE_OFFSETS = {
+MEETING_TIMEZONE_OFFSETS = MappingProxyType({
     "US/Eastern (EST)": "-04:00",  # EDT offset (daylight saving time)
     "US/Central (CST)": "-05:00",  # CDT offset
     "US/Mountain (MST)": "-06:00",  # MDT offset
     "US/Pacific (PST)": "-07:00",  # PDT offset
-}
+})
 
 _SUBJECT_PREFIX = re.compile(
     r"^\s*(?:\*\*|__|\*|_|\-)?\s*subject\s*(?:\*\*|__|\*|_)?\s*[:\-–—]\s*(.+)$",
@@ -20,6 +22,7 @@ _SUBJECT_PREFIX = re.compile(
 )
 
 
+@lru_cache(maxsize=512)
 def format_est_timestamp(raw: str | None) -> str:
     """Convert ISO timestamp to EST format like 'Jan 15, 03:45 PM EST'."""
     if not raw:
@@ -38,6 +41,14 @@ def format_est_timestamp(raw: str | None) -> str:
         return text
 
 
+@lru_cache(maxsize=512)
+def format_est_epoch(ts: int | None) -> str:
+    """Convert a Unix timestamp to the same EST format as format_est_timestamp."""
+    if ts is None:
+        return "Unknown"
+    return datetime.fromtimestamp(ts, EASTERN).strftime("%b %d, %I:%M %p EST")
+
+
 def split_subject_from_body(text: str) -> tuple[Optional[str], str]:
     """Detect leading 'Subject: ...' lines and return (subject, body_without_line)."""
     if not text:
@@ -60,5 +71,4 @@ def build_start_iso(selected_date, selected_time, tz_label: str) -> str:
     """Build ISO timestamp from date, time, and timezone label."""
     # Default to EDT offset if timezone not found
     offset = MEETING_TIMEZONE_OFFSETS.get(tz_label, "-04:00")
-    combined = datetime.combine(selected_date, selected_time)
-    return combined.strftime("%Y-%m-%dT%H:%M") + offset
+    return f"{selected_date.isoformat()}T{selected_time.hour:02d}:{selected_time.minute:02d}{offset}"
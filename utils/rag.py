@@ -50,7 +50,9 @@ class MCPClientProtocol(Protocol):
     ) -> List[Dict[str, Any]]:
         ...
 
+@lru_cache(maxsize=1)
 def get_system_prompt() -> str:
+    """Decode RAG_SYSTEM_PROMPT once per process; env changes need a restart."""
     text = os.getenv("RAG_SYSTEM_PROMPT")
     if not text:
         raise RuntimeError("Missing required environment variable: RAG_SYSTEM_PROMPT")
@@ -67,11 +69,15 @@ def require_env(value: Optional[str], name: str) -> str:
 # Token estimator
 _WORD_OR_PUNC = re.compile(r"\w+|[^\w\s]", re.UNICODE)
 
+@lru_cache(maxsize=1024)
 def estimate_tokens(text: str) -> int:
     if not text:
         return 0
     return len(_WORD_OR_PUNC.findall(str(text)))
 
+# One pooled session so repeat embeds reuse the keep-alive TLS connection
+_HF_SESSION = requests.Session()
+
 @lru_cache(maxsize=128)
 def embed_query(text: str) -> tuple:
     """
@@ -83,7 +89,7 @@ def embed_query(text: str) -> tuple:
     url = f"https://router.huggingface.co/hf-inference/models/{model}/pipeline/feature-extraction"
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
     payload = {"inputs": [text], "options": {"wait_for_model": True}}
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
+    resp = _HF_SESSION.post(url, headers=headers, json=payload, timeout=60)
     if resp.status_code >= 400:
         raise RuntimeError(f"Hugging Face error ({resp.status_code}): {resp.text}")
     data = resp.json()
@@ -93,12 +99,12 @@ def embed_query(text: str) -> tuple:
     vec = first.get("embedding") if isinstance(first, dict) else first
     if not isinstance(vec, list):
         raise RuntimeError(f"Invalid embedding payload: {first}")
-    floats = [float(x) for x in vec]
+    floats = list(map(float, vec))
     normalized = _l2_normalize(floats)
     return tuple(normalized)  # Return tuple for hashability
 
 def _l2_normalize(vec: List[float]) -> List[float]:
-    norm = math.sqrt(sum(x * x for x in vec))
+    norm = math.hypot(*vec)
     if norm == 0:
         return vec
     return [x / norm for x in vec]
@@ -141,8 +147,9 @@ def _fetch_neighbor_chunks(base_hits: List[Dict[str, Any]], radius: int) -> Dict
         return {}
     doc_map: Dict[str, set[int]] = defaultdict(set)
     for hit in base_hits:
-        doc_id = hit.get("document_id") or (hit.get("meta") or {}).get("document_id")
-        chunk_index = hit.get("chunk_index") or (hit.get("meta") or {}).get("chunk_index")
+        meta = hit.get("meta") or {}
+        doc_id = hit.get("document_id") or meta.get("document_id")
+        chunk_index = hit.get("chunk_index") or meta.get("chunk_index")
         if doc_id is None or chunk_index is None:
             continue
         for delta in range(1, radius + 1):
@@ -178,21 +185,22 @@ def _fetch_neighbor_chunks(base_hits: List[Dict[str, Any]], radius: int) -> Dict
 
             rows = getattr(resp, "data", []) or []
             for row in rows:
-                doc_id = row.get("document_id")
-                chunk_index = row.get("chunk_index")
-                meta = row.get("metadata") or {}
+                # Every key below is in the select() projection, so index directly.
+                doc_id = row["document_id"]
+                chunk_index = row["chunk_index"]
+                meta = row["metadata"] or {}
                 merged_meta = {
                     **meta,
-                    "section_title": row.get("section_title") or meta.get("section_title"),
-                    "filename": row.get("filename") or meta.get("filename"),
-                    "category": row.get("category") or meta.get("category"),
-                    "canonical": row.get("canonical") or meta.get("canonical"),
-                    "chunk_id": row.get("id") or meta.get("id"),
+                    "section_title": row["section_title"] or meta.get("section_title"),
+                    "filename": row["filename"] or meta.get("filename"),
+                    "category": row["category"] or meta.get("category"),
+                    "canonical": row["canonical"] or meta.get("canonical"),
+                    "chunk_id": row["id"] or meta.get("id"),
                     "document_id": doc_id,
                     "chunk_index": chunk_index,
                 }
                 neighbors[(doc_id, chunk_index)] = {
-                    "doc": row.get("content") or "",
+                    "doc": row["content"] or "",
                     "meta": merged_meta,
                     "score": None,
                     "document_id": doc_id,
@@ -228,8 +236,9 @@ def _expand_with_neighbors(hits: List[Dict[str, Any]], *, max_snippets: int) ->
 
     for hit in base:
         _add(hit)
-        doc_id = hit.get("document_id") or (hit.get("meta") or {}).get("document_id")
-        chunk_index = hit.get("chunk_index") or (hit.get("meta") or {}).get("chunk_index")
+        meta = hit.get("meta") or {}
+        doc_id = hit.get("document_id") or meta.get("document_id")
+        chunk_index = hit.get("chunk_index") or meta.get("chunk_index")
         if doc_id is None or chunk_index is None:
             continue
         for delta in range(1, NEIGHBOR_RADIUS + 1):
@@ -309,12 +318,26 @@ def _extract_relevant_sentence(doc: str, query: str) -> str:
     query = (query or "").strip()
     if not doc or not query:
         return ""
-    sentences = _SENTENCE_SPLIT.split(doc)
     lowered = query.lower()
-    for sentence in sentences:
-        if lowered in sentence.lower():
-            return sentence.strip()
-    return sentences[0].strip() if sentences else ""
+    lowered_doc = doc.lower()
+    if len(lowered_doc) == len(doc):
+        pos = lowered_doc.find(lowered)
+        while pos != -1:
+            start = 0
+            for boundary in _SENTENCE_SPLIT.finditer(lowered_doc, 0, pos):
+                start = boundary.end()
+            following = _SENTENCE_SPLIT.search(lowered_doc, pos)
+            end = following.start() if following else len(doc)
+            if pos + len(lowered) <= end:
+                return doc[start:end].strip()
+            pos = lowered_doc.find(lowered, end)
+    elif lowered in lowered_doc:
+        # Lowercasing changed the length (rare non-ASCII), so offsets no longer line up.
+        for sentence in _SENTENCE_SPLIT.split(doc):
+            if lowered in sentence.lower():
+                return sentence.strip()
+    match = _SENTENCE_SPLIT.search(doc)
+    return doc[: match.start()] if match else doc
 
 
 def format_context(hits: List[Dict[str, Any]], *, limit: Optional[int] = None, query: str = "") -> str:
@@ -370,41 +393,43 @@ def build_sources_block(hits: List[Dict[str, Any]]) -> str:
 
     return "\n".join(lines)
 
+_ORIENTATION_KEYWORDS = (
+    "orientation",
+    "orientation dates",
+    "orientation fees",
+    "orientation schedule",
+    "myorientation",
+)
+_INTL_ORIENTATION_KEYWORDS = (
+    "international orientation",
+    "glo-bull beginnings",
+    "international student orientation",
+    "mybullspath",
+)
+_FIRST_YEAR_TERMS = ("freshman", "first-year", "ftic")
+_INTL_KEYWORDS = (
+    "international student services",
+    "glo-bull beginnings",
+)
+
+@lru_cache(maxsize=256)
 def _augment_query(user_text: str) -> str:
     lowered = (user_text or "").lower()
     keywords: List[str] = []
-
-    if "orientation" in lowered:
-        keywords.extend([
-            "orientation",
-            "orientation dates",
-            "orientation fees",
-            "orientation schedule",
-            "myorientation",
-        ])
-        if "international" in lowered:
-            keywords.extend([
-                "international orientation",
-                "glo-bull beginnings",
-                "international student orientation",
-                "mybullspath",
-            ])
-        if any(term in lowered for term in ("freshman", "first-year", "ftic")):
+    has_orientation = "orientation" in lowered
+    has_international = "international" in lowered
+
+    if has_orientation:
+        keywords.extend(_ORIENTATION_KEYWORDS)
+        if has_international:
+            keywords.extend(_INTL_ORIENTATION_KEYWORDS)
+        if any(term in lowered for term in _FIRST_YEAR_TERMS):
             keywords.append("first-year orientation")
-
-    if "international" in lowered and "orientation" not in lowered:
-        keywords.extend([
-            "international student services",
-            "glo-bull beginnings",
-        ])
+    elif has_international:
+        keywords.extend(_INTL_KEYWORDS)
 
     if keywords:
-        dedup = []
-        seen = set()
-        for word in keywords:
-            if word not in seen:
-                dedup.append(word)
-                seen.add(word)
+        dedup = dict.fromkeys(keywords)  # ordered de-duplication
         return f"{user_text}\n\nRelated keywords: {', '.join(dedup)}"
     return user_text
 
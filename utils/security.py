@@ -22,6 +22,8 @@ _ZERO_WIDTH_CHARS = {
     "\ufeff",
 }
 _HTML_TAG_RE = re.compile(r"<[^>]+>")
+_INLINE_WHITESPACE_RE = re.compile(r"[^\S\r\n]+")
+_SMART_QUOTES = str.maketrans({"\u2019": "'", "\u201c": '"', "\u201d": '"'})
 
 
 @dataclass(frozen=True)
@@ -41,17 +43,21 @@ class _PromptRule:
 
 def sanitize_user_input(text: str) -> str:
     """Normalize user text by stripping dangerous characters and capping length."""
-    text = unescape(text or "")
+    if not text:
+        return ""
+    text = unescape(text)
     text = unicodedata.normalize("NFC", text)
-    text = text.replace("\u2019", "'").replace("\u201c", '"').replace("\u201d", '"')
-    text = "".join(
-        ch
-        for ch in text
-        if ch in ("\n", "\r")
-        or (unicodedata.category(ch) not in _CONTROL_CATEGORIES and ch not in _ZERO_WIDTH_CHARS)
-    )
+    text = text.translate(_SMART_QUOTES)
+    # Printable text (ignoring line breaks) holds no Cc/Cf characters, so skip the per-char scan
+    if not text.replace("\n", "").replace("\r", "").isprintable():
+        text = "".join(
+            ch
+            for ch in text
+            if ch in ("\n", "\r")
+            or (unicodedata.category(ch) not in _CONTROL_CATEGORIES and ch not in _ZERO_WIDTH_CHARS)
+        )
     text = _HTML_TAG_RE.sub(" ", text)
-    text = re.sub(r"[^\S\r\n]+", " ", text).strip()
+    text = _INLINE_WHITESPACE_RE.sub(" ", text).strip()
     return text[:MAX_INPUT_CHARS]
 
 
@@ -109,11 +115,16 @@ _SENSITIVE_KEYWORDS = {
     "confidential",
     "secret",
 }
+_SENSITIVE_KEYWORDS_RE = re.compile("|".join(re.escape(kw) for kw in sorted(_SENSITIVE_KEYWORDS)))
 
 
 _PBKDF2_TAG = "pbkdf2_sha256"
 _PBKDF2_ITERATIONS = int(os.getenv("AUTH_PBKDF2_ITERATIONS", "130000"))
 _PASSWORD_MIN_LENGTH = max(8, int(os.getenv("AUTH_PASSWORD_MIN_LENGTH", "10")))
+# Verified against on unknown usernames so a miss costs the same PBKDF2 work as a hit
+_DUMMY_USER = {
+    "pwd_hash": f"{_PBKDF2_TAG}${_PBKDF2_ITERATIONS}${secrets.token_hex(16)}${secrets.token_hex(32)}",
+}
 
 
 def analyze_prompt_security(text: str) -> PromptSecurityResult:
@@ -127,7 +138,7 @@ def analyze_prompt_security(text: str) -> PromptSecurityResult:
         if rule.pattern.search(lowered):
             score += rule.weight
             reasons.append(rule.reason)
-    keyword_hits = [kw for kw in _SENSITIVE_KEYWORDS if kw in lowered]
+    keyword_hits = list(dict.fromkeys(_SENSITIVE_KEYWORDS_RE.findall(lowered)))
     if len(keyword_hits) >= 2:
         score += 0.4
         reasons.append(f"Multiple sensitive keywords detected ({', '.join(keyword_hits[:3])})")
@@ -252,6 +263,7 @@ class AuthManager:
         username = (username or "").strip()
         u = self._fetch_user(username)
         if not u:
+            self._verify_password(password or "", _DUMMY_USER)
             return False, None
         if self._verify_password(password, u):
             return True, u["id"]
@@ -1,87 +1,102 @@
 """Session state initialization and action management."""
+import re
+import time
 import streamlit as st
+from collections import deque
 from datetime import date, datetime
-from typing import Any
+from functools import partial
+from typing import Any, Callable
+
+from utils.rag import estimate_tokens
 
 
 RECENT_ACTION_LIMIT = 5
 
+_EMAIL_CUE_RE = re.compile(
+    r"email assistant|draft an email|compose an email|send an email",
+    re.I,
+)
+_MEETING_CUE_RE = re.compile(
+    r"meeting assistant|schedule a meeting|calendar invite|book a meeting",
+    re.I,
+)
 
-def initialize_session_state() -> None:
-    """Initialize all session state variables with defaults."""
-    # Authentication
-    if "authenticated" not in st.session_state:
-        st.session_state.authenticated = False
-    if "user_id" not in st.session_state:
-        st.session_state.user_id = None
-    if "username" not in st.session_state:
-        st.session_state.username = None
 
+_SESSION_DEFAULTS: dict[str, Any] = {
+    # Authentication
+    "authenticated": False,
+    "user_id": None,
+    "username": None,
     # Chat session
-    if "current_session_id" not in st.session_state:
-        st.session_state.current_session_id = None
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "pending_regen" not in st.session_state:
-        st.session_state.pending_regen = False
-
+    "current_session_id": None,
+    "pending_regen": False,
     # Token budget tracking
-    if "token_total" not in st.session_state:
-        st.session_state.token_total = 0
-    if "limit_reached" not in st.session_state:
-        st.session_state.limit_reached = False
-
+    "token_total": 0,
+    "limit_reached": False,
     # Assistant UI state
-    st.session_state.setdefault("show_tool_picker", False)
-    st.session_state.setdefault("show_email_builder", False)
-    st.session_state.setdefault("show_meeting_builder", False)
-
+    "show_tool_picker": False,
+    "show_email_builder": False,
+    "show_meeting_builder": False,
     # Email assistant state
-    st.session_state.setdefault("pending_email", None)
-    st.session_state.setdefault("pending_email_draft", None)  # For two-phase email draft generation
-    st.session_state.setdefault("pending_email_edit", None)  # For two-phase email AI edit
-    st.session_state.setdefault("email_to_input", "")
-    st.session_state.setdefault("email_subject_input", "")
-    st.session_state.setdefault("email_student_message", "")
-    st.session_state.setdefault("email_draft_text", "")
-    st.session_state.setdefault("email_draft_sync_value", None)
-    st.session_state.setdefault("email_subject_sync_value", None)
-    st.session_state.setdefault("email_edit_instructions", "")
-    st.session_state.setdefault("email_fields_reset_pending", False)
-
+    "pending_email": None,
+    "pending_email_draft": None,  # For two-phase email draft generation
+    "pending_email_edit": None,  # For two-phase email AI edit
+    "email_to_input": "",
+    "email_subject_input": "",
+    "email_student_message": "",
+    "email_draft_text": "",
+    "email_draft_sync_value": None,
+    "email_subject_sync_value": None,
+    "email_edit_instructions": "",
+    "email_fields_reset_pending": False,
     # Meeting assistant state
-    st.session_state.setdefault("pending_meeting", None)
-    st.session_state.setdefault("pending_meeting_plan", None)  # For two-phase meeting planning
-    st.session_state.setdefault("pending_meeting_edit", None)  # For two-phase meeting AI edit
-    st.session_state.setdefault("meeting_summary_input", "")
-    st.session_state.setdefault("meeting_duration_input", 30)
-    st.session_state.setdefault("meeting_attendees_input", "")
-    st.session_state.setdefault("meeting_description_input", "")
-    st.session_state.setdefault("meeting_location_input", "")
-    st.session_state.setdefault("meeting_timezone_input", "US/Eastern (EST)")
-    st.session_state.setdefault("meeting_date_input", date.today())
-    st.session_state.setdefault(
-        "meeting_time_input",
-        datetime.now().replace(second=0, microsecond=0).time(),
-    )
-    st.session_state.setdefault("meeting_fields_reset_pending", False)
-    st.session_state.setdefault("meeting_notes_text", "")
-    st.session_state.setdefault("meeting_notes_sync_value", None)
-    st.session_state.setdefault("meeting_edit_instructions", "")
-
+    "pending_meeting": None,
+    "pending_meeting_plan": None,  # For two-phase meeting planning
+    "pending_meeting_edit": None,  # For two-phase meeting AI edit
+    "meeting_summary_input": "",
+    "meeting_duration_input": 30,
+    "meeting_attendees_input": "",
+    "meeting_description_input": "",
+    "meeting_location_input": "",
+    "meeting_timezone_input": "US/Eastern (EST)",
+    "meeting_fields_reset_pending": False,
+    "meeting_notes_text": "",
+    "meeting_notes_sync_value": None,
+    "meeting_edit_instructions": "",
+    # Processing state (for blocking all interactions during bot response)
+    "is_processing": False,
+    "pending_user_input": None,
+    # Dashboard
+    "show_dashboard": True,
+    # Login flow
+    "pending_login": None,
+}
+
+# Defaults that must be a fresh object per session or depend on the clock
+_SESSION_DEFAULT_FACTORIES: dict[str, Callable[[], Any]] = {
+    "messages": list,
+    "meeting_date_input": date.today,
+    "meeting_time_input": lambda: datetime.now().replace(second=0, microsecond=0).time(),
     # Action tracking
-    st.session_state.setdefault("recent_actions", [])
-    st.session_state.setdefault("pending_action_collapses", [])
+    "recent_actions": partial(deque, maxlen=RECENT_ACTION_LIMIT),
+    "pending_action_collapses": list,
+}
 
-    # Processing state (for blocking all interactions during bot response)
-    st.session_state.setdefault("is_processing", False)
-    st.session_state.setdefault("pending_user_input", None)
+_SESSION_KEYS = frozenset(_SESSION_DEFAULTS) | frozenset(_SESSION_DEFAULT_FACTORIES)
 
-    # Dashboard
-    st.session_state.setdefault("show_dashboard", True)
 
-    # Login flow
-    st.session_state.setdefault("pending_login", None)
+def initialize_session_state() -> None:
+    """
+    Initialize all session state variables with defaults.
+
+    Runs every rerun because Streamlit drops widget-backed keys (the
+    *_input fields) when their widget is not rendered; only missing keys
+    are written.
+    """
+    state = st.session_state
+    for key in _SESSION_KEYS.difference(state.keys()):
+        factory = _SESSION_DEFAULT_FACTORIES.get(key)
+        state[key] = factory() if factory else _SESSION_DEFAULTS[key]
 
 
 def activate_assistant(kind: str | None, *, rerun: bool = False) -> None:
@@ -107,7 +122,7 @@ def queue_action_collapse(action_type: str, data: dict[str, Any]) -> None:
     st.session_state.pending_action_collapses.append(
         {
             "type": action_type,
-            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "timestamp": int(time.time()),
             "data": data,
         }
     )
@@ -125,29 +140,39 @@ def handle_pending_action_collapses() -> None:
         elif entry["type"] == "meeting":
             st.session_state.show_meeting_builder = False
 
-    updated = pending + st.session_state.recent_actions
-    st.session_state.recent_actions = updated[:RECENT_ACTION_LIMIT]
+    # Newest first; the bounded deque drops the oldest entries past the limit
+    st.session_state.recent_actions.extendleft(reversed(pending))
     st.session_state.pending_action_collapses = []
 
 
+def record_assistant_message(
+    db,
+    mcp_client,
+    content: str,
+    *,
+    log_kind: str,
+    log_payload: dict[str, Any],
+    tokens: int | None = None,
+) -> int:
+    """Append an assistant message, persist and log it, and charge its tokens to the session."""
+    state = st.session_state
+    session_id = state.current_session_id
+    if tokens is None:
+        tokens = estimate_tokens(content)
+    state.messages.append({"role": "assistant", "content": content, "tokens": tokens})
+    db.add_message(session_id, "assistant", content, tokens_out=tokens)
+    mcp_client.log_interaction(session_id, log_kind, log_payload)
+    state.token_total += tokens
+    state.session_caches_stale = True  # app.py drops this user's cached session reads
+    return tokens
+
+
 def maybe_auto_open_assistant(response_text: str | None) -> None:
     """Auto-open assistant based on keywords in model response."""
     if not response_text:
         return
-    lowered = response_text.lower()
-    email_cues = (
-        "email assistant",
-        "draft an email",
-        "compose an email",
-        "send an email",
-    )
-    meeting_cues = (
-        "meeting assistant",
-        "schedule a meeting",
-        "calendar invite",
-        "book a meeting",
-    )
-    if any(cue in lowered for cue in email_cues):
+    # Email cues take priority over meeting cues regardless of position
+    if _EMAIL_CUE_RE.search(response_text):
         activate_assistant("email")
-    elif any(cue in lowered for cue in meeting_cues):
+    elif _MEETING_CUE_RE.search(response_text):
         activate_assistant("meeting")
@@ -1,11 +1,11 @@
-"""Improved streaming text renderer for smooth word-by-word output."""
+"""Rate-limited streaming text renderer for smooth incremental output."""
 import time as time_module
 
 
 class SmoothStreamer:
     """
-    Buffers model deltas and renders them word-by-word for a smooth streaming experience.
-    Optimized for fast, responsive output similar to Claude Code.
+    Buffers model deltas and re-renders the accumulated text at most once per
+    min_interval, so fast token streams don't flood the frontend.
     """
 
     def __init__(
@@ -13,20 +13,18 @@ class SmoothStreamer:
         placeholder,
         *,
         min_chars: int = 1,
-        max_lag: float = 0.015,  # Much faster: 15ms max lag
         initial_hold: float = 0.02,  # Quick initial render: 20ms
-        word_threshold: int = 2,  # Render every 2 words
+        min_interval: float = 0.05,  # At most one frontend update per 50ms
     ) -> None:
         self._placeholder = placeholder
         self._min_chars = min_chars
-        self._max_lag = max_lag
         self._initial_hold = initial_hold
-        self._word_threshold = word_threshold
+        self._min_interval = min_interval
         self._last_flush = time_module.monotonic()
         self._rendered = ""
+        self._rendered_len = 0
         self._latest = ""
         self._started = False
-        self._word_buffer = 0
 
     def update(self, text: str | None) -> None:
         """Update with new text delta from the model."""
@@ -36,37 +34,22 @@ class SmoothStreamer:
             return
 
         self._latest = text
-        now = time_module.monotonic()
-        delta = text[len(self._rendered):]
-
-        if not delta:
+        if len(text) <= self._rendered_len:
             return
 
         # Fast initial render - show something immediately
         if not self._started:
-            elapsed = now - self._last_flush
-            if len(text) >= self._min_chars or elapsed >= self._initial_hold:
+            if (
+                len(text) >= self._min_chars
+                or time_module.monotonic() - self._last_flush >= self._initial_hold
+            ):
                 self._flush(text)
                 self._started = True
             return
 
-        # Count words in delta for word-by-word rendering
-        new_words = self._count_words(delta)
-        self._word_buffer += new_words
-
-        # Render conditions (optimized for speed):
-        # 1. Accumulated enough words
-        # 2. New content is substantial
-        # 3. Time threshold exceeded (prevent lag)
-        should_render = (
-            self._word_buffer >= self._word_threshold
-            or len(delta) >= self._min_chars * 3  # Substantial chunk
-            or (now - self._last_flush) >= self._max_lag
-        )
-
-        if should_render:
+        # Rate-limit frontend updates; finalize() flushes whatever is left
+        if time_module.monotonic() - self._last_flush >= self._min_interval:
             self._flush(text)
-            self._word_buffer = 0
 
     def finalize(self, final_text: str | None = None) -> None:
         """Ensure final text is fully rendered."""
@@ -79,14 +62,7 @@ class SmoothStreamer:
 
     def _flush(self, text: str) -> None:
         """Render text to placeholder."""
-        self._placeholder.write(text)
+        self._placeholder.markdown(text)
         self._rendered = text
+        self._rendered_len = len(text)
         self._last_flush = time_module.monotonic()
-
-    @staticmethod
-    def _count_words(text: str) -> int:
-        """Count words in text for word-based flushing."""
-        stripped = text.strip()
-        if not stripped:
-            return 0
-        return len(stripped.split())
@@ -10,6 +10,7 @@ except ModuleNotFoundError:
     import tomli as tomllib
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
 
 
 def adjust_hex_color(color: str, factor: float) -> str:
@@ -19,17 +20,21 @@ def adjust_hex_color(color: str, factor: float) -> str:
     hex_value = color.strip().lstrip("#")
     if len(hex_value) not in (3, 6):
         return color
+    # int(..., 16) alone would also accept "0x", "_" and sign prefixes
+    if not _HEX_DIGITS.issuperset(hex_value):
+        raise ValueError(f"Invalid hex color: {color!r}")
     if len(hex_value) == 3:
         hex_value = "".join(ch * 2 for ch in hex_value)
-    comps = [int(hex_value[i : i + 2], 16) for i in (0, 2, 4)]
-    out = []
-    for comp in comps:
-        if factor >= 0:
-            comp = comp + (255 - comp) * min(factor, 1)
-        else:
-            comp = comp * max(1 + factor, 0)
-        out.append(int(max(0, min(255, round(comp)))))
-    return "#{:02x}{:02x}{:02x}".format(*out)
+    value = int(hex_value, 16)
+    r, g, b = value >> 16, (value >> 8) & 0xFF, value & 0xFF
+    if factor >= 0:
+        f = min(factor, 1)
+        r, g, b = r + (255 - r) * f, g + (255 - g) * f, b + (255 - b) * f
+    else:
+        f = max(1 + factor, 0)
+        r, g, b = r * f, g * f, b * f
+    r, g, b = (max(0, min(255, round(c))) for c in (r, g, b))
+    return f"#{(r << 16) | (g << 8) | b:06x}"
 
 
 @lru_cache(maxsize=1)
@@ -56,8 +61,9 @@ def load_theme_colors() -> dict[str, str]:
     return defaults
 
 
-def inject_global_styles() -> None:
-    """Inject global CSS styles with theme variables."""
+@lru_cache(maxsize=1)
+def _global_style_markup() -> str:
+    """Build the <style> block once; styles.css and the theme are static per process."""
     css_path = BASE_DIR / "styles.css"
     chunks = []
     colors = load_theme_colors()
@@ -74,7 +80,12 @@ def inject_global_styles() -> None:
     )
     if css_path.exists():
         chunks.append(css_path.read_text(encoding="utf-8"))
-    st.markdown("<style>" + "\n".join(chunks) + "</style>", unsafe_allow_html=True)
+    return "<style>" + "\n".join(chunks) + "</style>"
+
+
+def inject_global_styles() -> None:
+    """Inject global CSS styles with theme variables."""
+    st.markdown(_global_style_markup(), unsafe_allow_html=True)
 
 
 def scroll_chat_to_bottom() -> None:
@@ -88,12 +99,13 @@ def scroll_chat_to_bottom() -> None:
     - Re-enables auto-scroll when user manually scrolls to bottom
     """
     # Create a unique token based on current state to trigger scroll on changes
-    messages_len = len(st.session_state.get("messages", []))
-    show_email = int(bool(st.session_state.get("show_email_builder")))
-    show_meeting = int(bool(st.session_state.get("show_meeting_builder")))
-    show_picker = int(bool(st.session_state.get("show_tool_picker")))
-
-    token = f"{messages_len}-{show_email}-{show_meeting}-{show_picker}"
+    state = st.session_state
+    flags = (
+        (4 if state.get("show_email_builder") else 0)
+        | (2 if state.get("show_meeting_builder") else 0)
+        | (1 if state.get("show_tool_picker") else 0)
+    )
+    token = f"{len(state.get('messages', ()))}-{flags}"
 
     components.html(
         f"""